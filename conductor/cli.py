@@ -3,31 +3,58 @@
 import click
 import sys
 import os
-from pathlib import Path
-import pyperclip
+from datetime import datetime
 from rich.console import Console
-from rich.table import Table
-from rich.panel import Panel
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.markdown import Markdown
 import json
 
-from .db import Database
-from .templates import PromptTemplate
-from .context import ContextManager
-from .state import ProjectState
-from .registry import Registry
-from .monitor import ProgressMonitor
-from .sync import Sync
+# Heavier dependencies (pyperclip, rich tables/progress, conductor submodules)
+# are imported inside the commands that use them to keep startup fast.
 
 
 console = Console()
+# Status lines for commands whose stdout may be piped data
+err_console = Console(stderr=True)
+
+
+class _LazyDatabase:
+    """Database proxy that opens the connection on first use.
+
+    Commands that exit early (bad arguments, missing project name) never
+    touch SQLite.
+    """
+
+    def __init__(self, db_path):
+        self._db_path = db_path
+        self._db = None
+
+    def __getattr__(self, name):
+        if self._db is None:
+            from .db import Database
+
+            self._db = Database(self._db_path)
+        return getattr(self._db, name)
+
+    def close(self):
+        """Close the connection if it was ever opened."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
 
 
 def get_db():
-    """Get database instance."""
+    """Get database instance (opened lazily).
+
+    Inside a command the database is closed when the command finishes, which
+    checkpoints the write-ahead log into the database file.
+    """
     db_path = os.environ.get('CONDUCTOR_DB_PATH')
-    return Database(db_path)
+    db = _LazyDatabase(db_path)
+
+    ctx = click.get_current_context(silent=True)
+    if ctx is not None:
+        ctx.call_on_close(db.close)
+
+    return db
 
 
 def get_default_project():
@@ -43,11 +70,16 @@ def format_output(data, output_format='human'):
         output_format: 'human' or 'json'
     """
     if output_format == 'json':
-        console.print_json(json.dumps(data, indent=2))
+        _emit_json(data)
     else:
         return data  # Let caller handle human-readable format
 
 
+def _emit_json(data):
+    """Write data as JSON to stdout, bypassing rich's highlighter."""
+    click.echo(json.dumps(data, indent=2))
+
+
 @click.group()
 @click.version_option(version='0.1.0')
 def cli():
@@ -92,6 +124,8 @@ def add_task(task_description, project, force):
         sys.exit(1)
 
     # Check for scope creep
+    from .state import ProjectState
+
     state = ProjectState(proj['id'], db)
     is_creep, reason = state.check_scope_creep(task_description)
 
@@ -121,7 +155,10 @@ def complete(task_id, project):
     db = get_db()
 
     try:
-        db.update_task(task_id, status='completed')
+        if not db.update_task(task_id, status='completed'):
+            console.print(f"✗ Error: Task {task_id} not found", style="red")
+            sys.exit(1)
+
         console.print(f"✓ Task {task_id} marked as completed", style="green")
 
     except Exception as e:
@@ -134,6 +171,8 @@ def complete(task_id, project):
 @click.option('--format', type=click.Choice(['human', 'json']), default='human')
 def status(project, format):
     """Show project status."""
+    from rich.text import Text
+
     db = get_db()
 
     if project:
@@ -148,59 +187,77 @@ def status(project, format):
         console.print("No projects found. Create one with: conductor init <name> --scope \"...\"")
         return
 
-    for proj in projects:
-        if not proj:
-            continue
-
-        stats = db.get_task_stats(proj['id'])
+    if project:
+        all_stats = {projects[0]['id']: db.get_task_stats(projects[0]['id'])}
+    else:
+        # One grouped query for all stats instead of one per project
+        all_stats = db.get_all_task_stats()
 
-        # Create status display
-        if format == 'json':
-            data = {
+    if format == 'json':
+        data = [
+            {
                 'name': proj['name'],
                 'scope': proj['scope'],
-                'stats': stats,
+                'stats': all_stats[proj['id']],
                 'created_at': proj['created_at']
             }
-            console.print_json(json.dumps(data, indent=2))
-        else:
-            # Human-readable format
-            progress = int(stats['completed'] / stats['total'] * 100) if stats['total'] > 0 else 0
-
-            console.print(f"\n[bold]{proj['name']}[/] [dim]({_format_age(proj['created_at'])})[/]")
-            console.print(f"  Scope: {proj['scope']}")
-            console.print(f"  Progress: {progress}% ({stats['completed']}/{stats['total']} tasks)")
+            for proj in projects
+        ]
+        # A single project (-p) is emitted as an object, several as one list
+        _emit_json(data[0] if project else data)
+        return
 
-            # Show task breakdown
-            tasks = db.get_tasks(proj['id'])
+    # One query for all tasks instead of one per project
+    tasks_by_project = db.get_tasks_for_projects([p['id'] for p in projects])
+    now = datetime.now()
 
-            if tasks:
-                console.print()
-
-                for task in tasks:
-                    if task['status'] == 'completed':
-                        icon = "✓"
-                        style = "dim green"
-                    elif task['status'] == 'in_progress':
-                        icon = "⟳"
-                        style = "bold cyan"
-                    elif task['status'] == 'blocked':
-                        icon = "🚫"
-                        style = "red"
-                    else:
-                        icon = "○"
-                        style = "white"
-
-                    desc = task['description']
-                    if len(desc) > 70:
-                        desc = desc[:67] + "..."
-
-                    console.print(f"  {icon} {desc}", style=style)
-
-                    if task['status'] == 'in_progress':
-                        console.print(f"     [dim](in progress)[/]", style="cyan")
-                    elif task['status'] == 'blocked' and task.get('blocked_reason'):
-                        console.print(f"     [dim]Blocked: {task['blocked_reason']}[/]", style="red")
+    for proj in projects:
+        stats = all_stats[proj['id']]
+
+        # Human-readable format: build the whole block and print it once
+        progress = int(stats['completed'] / stats['total'] * 100) if stats['total'] > 0 else 0
+
+        block = Text("\n")
+        block.append(proj['name'], style="bold")
+        block.append(f" ({_format_age(proj['created_at'], now)})", style="dim")
+        block.append(f"\n  Scope: {proj['scope']}")
+        block.append(f"\n  Progress: {progress}% ({stats['completed']}/{stats['total']} tasks)")
+
+        # Show task breakdown
+        tasks = tasks_by_project[proj['id']]
+
+        if tasks:
+            block.append("\n")
+
+            for task in tasks:
+                if task['status'] == 'completed':
+                    icon = "✓"
+                    style = "dim green"
+                elif task['status'] == 'in_progress':
+                    icon = "⟳"
+                    style = "bold cyan"
+                elif task['status'] == 'blocked':
+                    icon = "🚫"
+                    style = "red"
+                else:
+                    icon = "○"
+                    style = "white"
+
+                # Truncate long descriptions while formatting the line
+                desc = task['description']
+                if len(desc) > 70:
+                    line = f"\n  {icon} {desc:.67}..."
+                else:
+                    line = f"\n  {icon} {desc}"
+
+                block.append(line, style=style)
+
+                if task['status'] == 'in_progress':
+                    block.append("\n     (in progress)", style="dim cyan")
+                elif task['status'] == 'blocked' and task.get('blocked_reason'):
+                    block.append(f"\n     Blocked: {task['blocked_reason']}", style="dim red")
+
+        console.print(block)
 
 
 @cli.command()
@@ -210,7 +267,14 @@ def status(project, format):
 @click.option('--no-copy', is_flag=True, help='Do not copy to clipboard')
 @click.option('--output', type=click.Path(), help='Write to file instead of clipboard')
 def prompt(template_name, project, var, no_copy, output):
-    """Generate an expanded prompt from a template."""
+    """Generate an expanded prompt from a template.
+
+    The prompt is copied to the clipboard unless --no-copy is given or
+    stdout is not a terminal, in which case it is printed.
+    """
+    from .templates import PromptTemplate
+    from .context import ContextManager
+
     db = get_db()
 
     # Parse variables
@@ -240,21 +304,32 @@ def prompt(template_name, project, var, no_copy, output):
     # Expand template
     templates = PromptTemplate(db)
 
-    try:
-        expanded = templates.expand(template_name, variables, variables.get('context'))
+    # Skip the clipboard helper subprocess when output is piped
+    use_clipboard = not no_copy and sys.stdout.isatty()
 
+    try:
         # Output
         if output:
-            Path(output).write_text(expanded)
+            # Stream segments straight to the file instead of building the full prompt
+            segments = templates.expand_iter(template_name, variables, variables.get('context'))
+            with open(output, 'w') as f:
+                f.writelines(segments)
             console.print(f"✓ Prompt written to {output}", style="green")
-        elif not no_copy:
-            pyperclip.copy(expanded)
-            console.print(f"✓ Prompt copied to clipboard ({len(expanded)} chars)", style="green")
         else:
-            console.print(expanded)
+            expanded = templates.expand(template_name, variables, variables.get('context'))
+
+            if use_clipboard:
+                import pyperclip
+
+                pyperclip.copy(expanded)
+                console.print(f"✓ Prompt copied to clipboard ({len(expanded)} chars)", style="green")
+            else:
+                click.echo(expanded)
 
         if project_name:
-            console.print(f"  [dim]With context from project: {project_name}[/]")
+            # Keep stdout limited to the prompt itself when it was echoed there
+            status_console = console if output or use_clipboard else err_console
+            status_console.print(f"  [dim]With context from project: {project_name}[/]")
 
     except ValueError as e:
         console.print(f"✗ Error: {e}", style="red")
@@ -273,6 +348,8 @@ def scope_check(task_description, project):
         console.print(f"✗ Error: Project '{project}' not found", style="red")
         sys.exit(1)
 
+    from .state import ProjectState
+
     state = ProjectState(proj['id'], db)
     is_creep, reason = state.check_scope_creep(task_description)
 
@@ -290,6 +367,8 @@ def scope_check(task_description, project):
 @click.option('--category', help='Filter by category')
 def tools(project, category):
     """List relevant tools for current project/task."""
+    from .registry import Registry
+
     db = get_db()
 
     project_name = project or get_default_project()
@@ -309,60 +388,45 @@ def tools(project, category):
 
     # Display MCP servers
     if all_tools['mcp_servers']:
-        console.print("\n[bold]MCP Servers:[/]")
-
-        table = Table(show_header=True)
-        table.add_column("Name", style="cyan")
-        table.add_column("Category")
-        table.add_column("Description")
-        table.add_column("Relevance", justify="right")
-
-        for server in all_tools['mcp_servers']:
-            relevance = server.get('relevance', 0)
-            rel_display = f"{relevance:.2f}" if context else "-"
-
-            table.add_row(
+        rows = [
+            (
                 server['name'],
                 server.get('category', ''),
                 server.get('description', ''),
-                rel_display
+                f"{server.get('relevance', 0):.2f}" if context else "-"
             )
+            for server in all_tools['mcp_servers']
+        ]
+
+        table = _section_table("MCP Servers", "Name", "Category", "Description", "Relevance")
+        for row in rows:
+            table.add_row(*row)
 
         console.print(table)
 
     # Display skills
     if all_tools['skills']:
-        console.print("\n[bold]Skills:[/]")
-
-        table = Table(show_header=True)
-        table.add_column("Name", style="cyan")
-        table.add_column("Category")
-        table.add_column("When to use")
-
-        for skill in all_tools['skills'][:10]:  # Limit to top 10
-            table.add_row(
-                skill['name'],
-                skill.get('category', ''),
-                skill.get('when', '')
-            )
+        rows = [
+            (skill['name'], skill.get('category', ''), skill.get('when', ''))
+            for skill in all_tools['skills'][:10]  # Limit to top 10
+        ]
+
+        table = _section_table("Skills", "Name", "Category", "When to use")
+        for row in rows:
+            table.add_row(*row)
 
         console.print(table)
 
     # Display subagents
     if all_tools['subagents']:
-        console.print("\n[bold]Subagents:[/]")
-
-        table = Table(show_header=True)
-        table.add_column("Name", style="cyan")
-        table.add_column("Triggers")
-        table.add_column("Description")
-
-        for agent in all_tools['subagents'][:5]:  # Limit to top 5
-            table.add_row(
-                agent['name'],
-                agent.get('trigger', ''),
-                agent.get('description', '')
-            )
+        rows = [
+            (agent['name'], agent.get('trigger', ''), agent.get('description', ''))
+            for agent in all_tools['subagents'][:5]  # Limit to top 5
+        ]
+
+        table = _section_table("Subagents", "Name", "Triggers", "Description")
+        for row in rows:
+            table.add_row(*row)
 
         console.print(table)
 
@@ -372,6 +436,9 @@ def tools(project, category):
 @click.option('--pull', is_flag=True, help='Pull remote state to local')
 def sync(push, pull):
     """Synchronize state across machines."""
+    from rich.progress import Progress, SpinnerColumn, TextColumn
+    from .sync import Sync
+
     syncer = Sync()
 
     if not push and not pull:
@@ -389,38 +456,33 @@ def sync(push, pull):
 
         return
 
-    if push:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            progress.add_task("Pushing state...", total=None)
+    # One live display covers both steps when --push and --pull are combined
+    with Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        console=console
+    ) as progress:
+        spinner = progress.add_task("Pushing state..." if push else "Pulling state...", total=None)
 
+        if push:
             result = syncer.push_state()
 
-        if result['success']:
-            console.print(f"✓ State pushed ({result['method']})", style="green")
-            syncer.mark_synced()
-        else:
-            console.print(f"✗ Push failed: {result.get('error', 'Unknown error')}", style="red")
-            sys.exit(1)
-
-    if pull:
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            console=console
-        ) as progress:
-            progress.add_task("Pulling state...", total=None)
+            if result['success']:
+                console.print(f"✓ State pushed ({result['method']})", style="green")
+                syncer.mark_synced()
+            else:
+                console.print(f"✗ Push failed: {result.get('error', 'Unknown error')}", style="red")
+                sys.exit(1)
 
+        if pull:
+            progress.update(spinner, description="Pulling state...")
             result = syncer.pull_state()
 
-        if result['success']:
-            console.print(f"✓ State pulled ({result['method']})", style="green")
-        else:
-            console.print(f"✗ Pull failed: {result.get('error', 'Unknown error')}", style="red")
-            sys.exit(1)
+            if result['success']:
+                console.print(f"✓ State pulled ({result['method']})", style="green")
+            else:
+                console.print(f"✗ Pull failed: {result.get('error', 'Unknown error')}", style="red")
+                sys.exit(1)
 
 
 @cli.command()
@@ -454,6 +516,8 @@ def session(action, project):
         console.print(f"✓ Session {session_id[:8]} ended", style="green")
 
         # Show session summary
+        from .monitor import ProgressMonitor
+
         monitor = ProgressMonitor(db)
         analysis = monitor.analyze_session(session_id)
 
@@ -477,6 +541,8 @@ def report(project):
         console.print(f"✗ Error: Project '{project_name}' not found", style="red")
         sys.exit(1)
 
+    from .monitor import ProgressMonitor
+
     monitor = ProgressMonitor(db)
     report_data = monitor.get_productivity_report(proj['id'])
 
@@ -526,6 +592,9 @@ def report(project):
 @cli.command()
 def templates():
     """List available templates."""
+    from rich.table import Table
+    from .templates import PromptTemplate
+
     db = get_db()
     tmpl = PromptTemplate(db)
 
@@ -551,12 +620,41 @@ def templates():
     console.print(table)
 
 
-def _format_age(timestamp):
-    """Format timestamp as age string."""
-    from datetime import datetime
+def _section_table(title, *columns):
+    """Build a table whose title doubles as the section header.
+
+    The first column is styled as a name column; a "Relevance" column is
+    right-aligned.
+    """
+    from rich.table import Table
+
+    table = Table(
+        title=f"\n{title}:",
+        title_style="bold",
+        title_justify="left",
+        show_header=True
+    )
+    for i, column in enumerate(columns):
+        if i == 0:
+            table.add_column(column, style="cyan")
+        elif column == "Relevance":
+            table.add_column(column, justify="right")
+        else:
+            table.add_column(column)
+    return table
+
+
+def _format_age(timestamp, now=None):
+    """Format timestamp as age string.
+
+    Args:
+        timestamp: ISO timestamp
+        now: Reference time (default: current time)
+    """
+    if now is None:
+        now = datetime.now()
 
-    dt = datetime.fromisoformat(timestamp)
-    age = datetime.now() - dt
+    age = now - datetime.fromisoformat(timestamp)
 
     if age.days > 0:
         return f"{age.days} days old"
@@ -1,13 +1,30 @@
 """Context manager for optimizing prompt context."""
 
 from typing import List, Dict, Tuple
+from collections import defaultdict, OrderedDict
 from datetime import datetime, timedelta
 import re
 
 
+_WORD_RE = re.compile(r'\b\w+\b')
+
+# Common stop words ignored when extracting scope keywords
+_STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for',
+    'from', 'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on',
+    'that', 'the', 'to', 'was', 'will', 'with'
+})
+
+# Common exclusion phrasings in a project scope ("no UI", "without auth", ...)
+_EXCLUSION_RE = re.compile(r"(?:no|without|don't|exclude|not\s+including)\s+(\w+)")
+
+
 class ContextManager:
     """Manages and optimizes context for Claude Code prompts."""
 
+    # Maximum number of formatted contexts kept in memory
+    CONTEXT_CACHE_SIZE = 32
+
     def __init__(self, db, max_context_size: int = 8000):
         """Initialize context manager.
 
@@ -17,6 +34,8 @@ class ContextManager:
         """
         self.db = db
         self.max_context_size = max_context_size
+        self._context_cache = OrderedDict()
+        self._scope_cache = {}
 
     def prepare_context(self, project_id: str) -> str:
         """Build optimized context for a project.
@@ -39,20 +58,29 @@ class ContextManager:
 
         return self.optimize_context(context_parts)
 
-    def get_project_header(self, project_id: str) -> str:
+    def get_project_header(
+        self,
+        project_id: str,
+        project: Dict = None,
+        stats: Dict[str, int] = None
+    ) -> str:
         """Get project header with scope and status.
 
         Args:
             project_id: Project ID
+            project: Already-fetched project dict (optional)
+            stats: Already-fetched task stats (optional)
 
         Returns:
             Header string
         """
-        project = self.db.get_project(project_id=project_id)
+        if project is None:
+            project = self.db.get_project(project_id=project_id)
         if not project:
             return ""
 
-        stats = self.db.get_task_stats(project_id)
+        if stats is None:
+            stats = self.db.get_task_stats(project_id)
 
         header_parts = [
             f"# Project: {project['name']}",
@@ -71,20 +99,38 @@ class ContextManager:
 
         return "".join(header_parts)
 
-    def get_relevant_history(self, project_id: str, max_items: int = 10) -> str:
+    def get_relevant_history(
+        self,
+        project_id: str,
+        max_items: int = 10,
+        stats: Dict[str, int] = None
+    ) -> str:
         """Get relevant task history.
 
         Args:
             project_id: Project ID
             max_items: Maximum number of items to include
+            stats: Already-fetched task stats; skips the query when empty (optional)
 
         Returns:
             History string
         """
+        if stats is not None and stats['total'] == 0:
+            return ""
+
         parts = []
 
+        # Fetch the relevant tasks once and bucket them by status
+        by_status = defaultdict(list)
+        tasks = self.db.get_tasks_by_statuses(
+            project_id,
+            ['completed', 'in_progress', 'pending', 'blocked']
+        )
+        for task in tasks:
+            by_status[task['status']].append(task)
+
         # Completed tasks (most recent)
-        completed = self.db.get_tasks(project_id, status='completed')
+        completed = by_status['completed']
         if completed:
             recent_completed = completed[-max_items:]
             parts.append("\n\n## Recently Completed")
@@ -92,14 +138,14 @@ class ContextManager:
                 parts.append(f"\n- ✓ {task['description']}")
 
         # In-progress tasks
-        in_progress = self.db.get_tasks(project_id, status='in_progress')
+        in_progress = by_status['in_progress']
         if in_progress:
             parts.append("\n\n## In Progress")
             for task in in_progress:
                 parts.append(f"\n- ⟳ {task['description']}")
 
         # Pending tasks (next few)
-        pending = self.db.get_tasks(project_id, status='pending')
+        pending = by_status['pending']
         if pending:
             parts.append("\n\n## Next Tasks")
             for task in pending[:5]:
@@ -108,7 +154,7 @@ class ContextManager:
                 parts.append(f"\n- ... and {len(pending) - 5} more")
 
         # Blocked tasks with reasons
-        blocked = self.db.get_tasks(project_id, status='blocked')
+        blocked = by_status['blocked']
         if blocked:
             parts.append("\n\n## Blocked Tasks")
             for task in blocked:
@@ -165,20 +211,19 @@ class ContextManager:
         Returns:
             Optimized context string
         """
-        # Join all parts
-        full_context = "\n".join(parts)
+        # Measure before joining so the final string is built only once
+        sizes = [len(p) for p in parts]
+        total_size = sum(sizes) + max(0, len(parts) - 1)
 
         # If it fits, return as-is
-        if len(full_context) <= self.max_context_size:
-            return full_context
+        if total_size <= self.max_context_size:
+            return "\n".join(parts)
 
         # Need to prune - start from end and work backwards
         result_parts = []
         current_size = 0
 
-        for part in parts:
-            part_size = len(part)
-
+        for part, part_size in zip(parts, sizes):
             if current_size + part_size <= self.max_context_size:
                 result_parts.append(part)
                 current_size += part_size
@@ -201,25 +246,32 @@ class ContextManager:
         Returns:
             List of keywords
         """
+        keywords, _ = self._get_scope_keywords_cached(project_id)
+        return list(keywords)
+
+    def _get_scope_keywords_cached(self, project_id: str) -> Tuple[List[str], frozenset]:
+        """Get scope keywords as a list and a set, reusing prior extraction.
+
+        Entries are keyed by the scope text, so editing the scope refreshes them.
+        """
         project = self.db.get_project(project_id=project_id)
         if not project:
-            return []
+            return [], frozenset()
 
         scope = project['scope']
 
-        # Extract meaningful words (simple approach)
-        # Remove common stop words
-        stop_words = {
-            'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for',
-            'from', 'has', 'he', 'in', 'is', 'it', 'its', 'of', 'on',
-            'that', 'the', 'to', 'was', 'will', 'with'
-        }
+        cached = self._scope_cache.get(project_id)
+        if cached and cached[0] == scope:
+            return cached[1], cached[2]
 
-        # Split on word boundaries and filter
-        words = re.findall(r'\b\w+\b', scope.lower())
-        keywords = [w for w in words if w not in stop_words and len(w) > 2]
+        # Extract meaningful words (simple approach)
+        # Split on word boundaries and filter out stop words
+        words = _WORD_RE.findall(scope.lower())
+        keywords = [w for w in words if w not in _STOP_WORDS and len(w) > 2]
+        keyword_set = frozenset(keywords)
 
-        return keywords
+        self._scope_cache[project_id] = (scope, keywords, keyword_set)
+        return keywords, keyword_set
 
     def calculate_relevance_score(
         self,
@@ -235,25 +287,46 @@ class ContextManager:
         Returns:
             Relevance score (0-1)
         """
-        scope_keywords = set(self.get_scope_keywords(project_id))
+        return self.calculate_relevance_scores([task_description], project_id)[0]
+
+    def calculate_relevance_scores(
+        self,
+        task_descriptions: List[str],
+        project_id: str
+    ) -> List[float]:
+        """Calculate relevance to project scope for many tasks at once.
+
+        Scope keywords are looked up once for the whole batch.
+
+        Args:
+            task_descriptions: Task descriptions
+            project_id: Project ID
+
+        Returns:
+            Relevance scores (0-1), in the same order as the descriptions
+        """
+        _, scope_keywords = self._get_scope_keywords_cached(project_id)
         if not scope_keywords:
-            return 0.5  # No data to determine
+            return [0.5] * len(task_descriptions)  # No data to determine
 
-        # Extract keywords from task
-        task_words = re.findall(r'\b\w+\b', task_description.lower())
-        task_keywords = set(w for w in task_words if len(w) > 2)
+        scope_size = len(scope_keywords)
+        scores = []
 
-        if not task_keywords:
-            return 0.5
+        for description in task_descriptions:
+            # Extract keywords from task
+            task_keywords = {
+                w for w in _WORD_RE.findall(description.lower()) if len(w) > 2
+            }
 
-        # Calculate Jaccard similarity
-        intersection = scope_keywords & task_keywords
-        union = scope_keywords | task_keywords
+            if not task_keywords:
+                scores.append(0.5)
+                continue
 
-        if not union:
-            return 0.5
+            # Calculate Jaccard similarity (|A ∪ B| = |A| + |B| - |A ∩ B|)
+            intersection = len(scope_keywords & task_keywords)
+            scores.append(intersection / (scope_size + len(task_keywords) - intersection))
 
-        return len(intersection) / len(union)
+        return scores
 
     def get_exclusions(self, project_id: str) -> List[str]:
         """Extract explicit exclusions from project scope.
@@ -268,38 +341,39 @@ class ContextManager:
         if not project:
             return []
 
-        scope = project['scope']
-
-        # Look for common exclusion patterns
-        exclusion_patterns = [
-            r'no\s+(\w+)',
-            r'without\s+(\w+)',
-            r"don't\s+(\w+)",
-            r'exclude\s+(\w+)',
-            r'not\s+including\s+(\w+)',
-        ]
-
-        exclusions = []
-        for pattern in exclusion_patterns:
-            matches = re.findall(pattern, scope.lower())
-            exclusions.extend(matches)
-
-        return exclusions
+        # Look for common exclusion patterns in a single pass
+        return _EXCLUSION_RE.findall(project['scope'].lower())
 
     def format_context_for_llm(
         self,
         project_id: str,
-        include_sections: Dict[str, bool] = None
+        include_sections: Dict[str, bool] = None,
+        project: Dict = None,
+        stats: Dict[str, int] = None
     ) -> str:
         """Format complete context optimized for LLM consumption.
 
         Args:
             project_id: Project ID
             include_sections: Dict of section flags (header, history, etc.)
+            project: Already-fetched project dict, passed to the header (optional)
+            stats: Already-fetched task stats, passed to the header (optional)
 
         Returns:
             Formatted context string
         """
+        # Output is deterministic for an unchanged database, so reuse it
+        cache_key = (
+            project_id,
+            tuple(sorted(include_sections.items())) if include_sections else None,
+            self.max_context_size,
+            self.db.get_data_version()
+        )
+        cached = self._context_cache.get(cache_key)
+        if cached is not None:
+            self._context_cache.move_to_end(cache_key)
+            return cached
+
         if include_sections is None:
             include_sections = {
                 'header': True,
@@ -308,13 +382,17 @@ class ContextManager:
                 'patterns': True
             }
 
+        # The header needs stats anyway; share them so history can skip empty projects
+        if stats is None and include_sections.get('header', True):
+            stats = self.db.get_task_stats(project_id)
+
         parts = []
 
         if include_sections.get('header', True):
-            parts.append(self.get_project_header(project_id))
+            parts.append(self.get_project_header(project_id, project=project, stats=stats))
 
         if include_sections.get('history', True):
-            parts.append(self.get_relevant_history(project_id))
+            parts.append(self.get_relevant_history(project_id, stats=stats))
 
         if include_sections.get('decisions', True):
             parts.append(self.get_recent_decisions(project_id))
@@ -327,7 +405,13 @@ class ContextManager:
         # Remove empty parts
         parts = [p for p in parts if p.strip()]
 
-        return self.optimize_context(parts)
+        context = self.optimize_context(parts)
+
+        self._context_cache[cache_key] = context
+        if len(self._context_cache) > self.CONTEXT_CACHE_SIZE:
+            self._context_cache.popitem(last=False)
+
+        return context
 
     def get_summary(self, project_id: str) -> Dict[str, any]:
         """Get a summary of project context metrics.
@@ -346,7 +430,7 @@ class ContextManager:
         learnings = self.db.get_learnings(project_id=project_id, limit=100)
         active_sessions = self.db.get_active_sessions(project_id)
 
-        context = self.format_context_for_llm(project_id)
+        context = self.format_context_for_llm(project_id, project=project, stats=stats)
 
         return {
             'project_name': project['name'],
@@ -2,15 +2,160 @@
 
 import sqlite3
 import json
+import atexit
+from collections import Counter
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, List, Dict, Tuple, Any
+from typing import Optional, List, Dict, Tuple, Any, Iterator
+from functools import lru_cache
+import socket
 import uuid
+import weakref
+
+# Resolved once per process; start_session uses it as the default machine ID
+_DEFAULT_MACHINE_ID = socket.gethostname()
+
+
+# Static SQL, defined once at import time
+_SQL_INSERT_PROJECT = "INSERT INTO projects (id, name, scope) VALUES (?, ?, ?)"
+_SQL_GET_PROJECT_BY_ID = "SELECT * FROM projects WHERE id = ?"
+_SQL_GET_PROJECT_BY_NAME = "SELECT * FROM projects WHERE name = ?"
+_SQL_GET_ALL_PROJECTS = "SELECT * FROM projects ORDER BY updated_at DESC"
+_SQL_DELETE_PROJECT = "DELETE FROM projects WHERE id = ?"
+
+_SQL_INSERT_TASK = """INSERT INTO tasks (project_id, description, status, is_scope_creep)
+                      VALUES (?, ?, ?, ?)"""
+_SQL_DELETE_TASK = "DELETE FROM tasks WHERE id = ?"
+_SQL_GET_TASKS_COMPLETED_SINCE = """SELECT * FROM tasks
+                                    WHERE project_id = ? AND status = 'completed'
+                                      AND julianday(completed_at) >= julianday(?)
+                                    ORDER BY created_at ASC, id ASC"""
+_SQL_TASK_STATS = """SELECT COALESCE(SUM(status = 'pending'), 0) AS pending,
+                            COALESCE(SUM(status = 'in_progress'), 0) AS in_progress,
+                            COALESCE(SUM(status = 'completed'), 0) AS completed,
+                            COALESCE(SUM(status = 'blocked'), 0) AS blocked,
+                            COUNT(*) AS total
+                     FROM tasks
+                     WHERE project_id = ?"""
+_SQL_ALL_TASK_STATS = """SELECT p.id as project_id, t.status, COUNT(t.id) as count
+                         FROM projects p
+                         LEFT JOIN tasks t ON t.project_id = p.id
+                         GROUP BY p.id, t.status"""
+_SQL_LAST_INSERT_ROWID = "SELECT last_insert_rowid()"
+
+# Keyed by (filter on status, exclude scope creep)
+_SQL_GET_TASKS = {
+    (False, False): """SELECT * FROM tasks WHERE project_id = ?
+                       ORDER BY created_at ASC, id ASC""",
+    (True, False): """SELECT * FROM tasks WHERE project_id = ? AND status = ?
+                      ORDER BY created_at ASC, id ASC""",
+    (False, True): """SELECT * FROM tasks WHERE project_id = ? AND is_scope_creep = 0
+                      ORDER BY created_at ASC, id ASC""",
+    (True, True): """SELECT * FROM tasks
+                     WHERE project_id = ? AND status = ? AND is_scope_creep = 0
+                     ORDER BY created_at ASC, id ASC""",
+}
+
+_SQL_INSERT_SESSION = "INSERT INTO sessions (id, project_id, machine_id) VALUES (?, ?, ?)"
+_SQL_END_SESSION = "UPDATE sessions SET ended_at = CURRENT_TIMESTAMP WHERE id = ?"
+_SQL_GET_SESSION = "SELECT * FROM sessions WHERE id = ?"
+# Active sessions first, each group newest first; LIMIT -1 means no limit
+_SQL_GET_PROJECT_SESSIONS = """SELECT * FROM sessions WHERE project_id = ?
+                               ORDER BY ended_at IS NULL DESC, started_at DESC
+                               LIMIT ? OFFSET ?"""
+_SQL_SESSION_TIME_SUMMARY = """SELECT COUNT(*) AS session_count,
+                                      COALESCE(SUM((julianday(COALESCE(ended_at, 'now'))
+                                                    - julianday(started_at)) * 24.0), 0)
+                                          AS total_hours
+                               FROM sessions
+                               WHERE project_id = ?"""
+# Keyed by whether a project filter is given
+_SQL_GET_ACTIVE_SESSIONS = {
+    False: """SELECT * FROM sessions WHERE ended_at IS NULL
+              ORDER BY started_at DESC""",
+    True: """SELECT * FROM sessions WHERE ended_at IS NULL AND project_id = ?
+             ORDER BY started_at DESC""",
+}
+_SQL_ADD_SESSION_TASKS = (
+    "UPDATE sessions SET tasks_completed = tasks_completed + ? WHERE id = ?"
+)
+
+_SQL_INSERT_LEARNING = """INSERT INTO learnings (pattern, context, project_id, session_id)
+                          VALUES (?, ?, ?, ?)"""
+# Keyed by (filter on project, filter on session)
+_SQL_GET_LEARNINGS = {
+    (False, False): """SELECT * FROM learnings
+                       ORDER BY created_at DESC LIMIT ?""",
+    (True, False): """SELECT * FROM learnings WHERE project_id = ?
+                      ORDER BY created_at DESC LIMIT ?""",
+    (False, True): """SELECT * FROM learnings WHERE session_id = ?
+                      ORDER BY created_at DESC LIMIT ?""",
+    (True, True): """SELECT * FROM learnings WHERE project_id = ? AND session_id = ?
+                     ORDER BY created_at DESC LIMIT ?""",
+}
+
+_SQL_UPSERT_TEMPLATE = """INSERT OR REPLACE INTO templates (name, content, variables)
+                          VALUES (?, ?, ?)"""
+_SQL_GET_TEMPLATE = "SELECT * FROM templates WHERE name = ?"
+_SQL_GET_ALL_TEMPLATES = "SELECT * FROM templates ORDER BY usage_count DESC, name ASC"
+_SQL_ADD_TEMPLATE_USAGE = (
+    "UPDATE templates SET usage_count = usage_count + ? WHERE name = ?"
+)
+
+
+def _template_from_row(row: sqlite3.Row) -> Dict:
+    """Convert a template row to a dict with its variables JSON decoded."""
+    result = dict(row)
+    if result.get('variables'):
+        result['variables'] = json.loads(result['variables'])
+    return result
+
+
+@lru_cache(maxsize=64)
+def _build_update_sql(table: str, columns: Tuple[str, ...], extra_set: str = "") -> str:
+    """Build an UPDATE ... WHERE id = ? statement for a set of columns.
+
+    Memoized so repeated keyword patterns reuse the same SQL string.
+
+    Args:
+        table: Table name
+        columns: Column names, in the order their values are bound
+        extra_set: Additional literal SET assignments (e.g. a timestamp)
+    """
+    fields = ", ".join(f"{column} = ?" for column in columns)
+    if extra_set:
+        fields = f"{fields}, {extra_set}"
+    return f"UPDATE {table} SET {fields} WHERE id = ?"
+
+
+# Databases not yet closed; flushed and optimized at process exit without
+# keeping otherwise unreferenced instances alive
+_open_databases = weakref.WeakSet()
+
+
+@atexit.register
+def _finish_open_databases():
+    """Finish every database the caller never closed."""
+    for db in list(_open_databases):
+        db._finish()
 
 
 class Database:
     """SQLite database interface for managing projects, tasks, sessions, and learnings."""
 
+    # Size of sqlite3's per-connection prepared statement cache. It is keyed by
+    # SQL text, so every distinct query shape (including the dynamically built
+    # filters and SET clauses below) stays prepared for the connection's lifetime.
+    STATEMENT_CACHE_SIZE = 256
+
+    # Buffered counter increments are written once this many are pending
+    COUNTER_FLUSH_THRESHOLD = 50
+
+    # Databases that have never been analyzed get a full ANALYZE on open once
+    # any table holds more rows than this
+    ANALYZE_MIN_ROWS = 1000
+
     def __init__(self, db_path: str = None):
         """Initialize database connection.
 
@@ -26,27 +171,112 @@ class Database:
         db_path.parent.mkdir(parents=True, exist_ok=True)
 
         self.db_path = str(db_path)
-        self.conn = sqlite3.connect(self.db_path)
+        self.conn = sqlite3.connect(
+            self.db_path,
+            cached_statements=self.STATEMENT_CACHE_SIZE
+        )
         self.conn.row_factory = sqlite3.Row
+        self._closed = False
+        self._transaction_depth = 0
+        self._pending_session_tasks: Counter = Counter()
+        self._pending_template_usage: Counter = Counter()
+        self._pending_increments = 0
+        self._configure_connection()
         self._initialize_schema()
+        self._analyze_if_needed()
+        _open_databases.add(self)
+
+    def _configure_connection(self):
+        """Apply connection-level PRAGMAs.
+
+        WAL lets readers run alongside a writer and, with synchronous=NORMAL,
+        avoids an fsync on every commit while staying crash-safe.
+        """
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
+        self.conn.execute("PRAGMA cache_size=-64000")  # ~64 MB page cache
+        self.conn.execute("PRAGMA mmap_size=268435456")  # 256 MB
+        self.conn.execute("PRAGMA foreign_keys=ON")
+
+    def _analyze_if_needed(self):
+        """Collect planner statistics for a populated, never-analyzed database.
+
+        Later runs keep the statistics fresh through PRAGMA optimize, run by
+        _finish() on close() or at process exit.
+        """
+        has_stats = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'"
+        ).fetchone()
+        if has_stats and self.conn.execute("SELECT 1 FROM sqlite_stat1 LIMIT 1").fetchone():
+            return
+
+        for table in ("tasks", "sessions", "learnings"):
+            populated = self.conn.execute(
+                f"SELECT 1 FROM {table} LIMIT 1 OFFSET ?", (self.ANALYZE_MIN_ROWS,)
+            ).fetchone()
+            if populated:
+                self.conn.execute("ANALYZE")
+                return
+
+    @contextmanager
+    def transaction(self):
+        """Group several operations into a single transaction.
+
+        Mutating methods called inside the block skip their own commit, so
+        the whole group is committed (or rolled back on error) at once.
+        Nested blocks join the outermost transaction, and so does an implicit
+        transaction sqlite3 left open (e.g. after a failed write).
+
+        Buffered counter increments are written before the outermost block
+        begins; increments made inside it are applied immediately, so they
+        commit or roll back with the rest of the block.
+        """
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+
+        if not self.conn.in_transaction:
+            self.flush_counters()
+            self.conn.execute("BEGIN")
+        self._transaction_depth = 1
+        try:
+            yield self
+            self.conn.commit()
+        except BaseException:
+            self.conn.rollback()
+            raise
+        finally:
+            self._transaction_depth = 0
+
+    def _commit(self):
+        """Commit unless a transaction() block is in progress."""
+        if not self._transaction_depth:
+            self.conn.commit()
 
     def _initialize_schema(self):
-        """Create database tables if they don't exist."""
-        cursor = self.conn.cursor()
+        """Create database tables if they don't exist.
+
+        All statements run in one transaction so a fresh database is set up
+        with a single commit.
+        """
+        self.conn.executescript("""
+            BEGIN;
 
-        # Projects table
-        cursor.execute("""
+            -- Projects table
             CREATE TABLE IF NOT EXISTS projects (
                 id TEXT PRIMARY KEY,
                 name TEXT UNIQUE NOT NULL,
                 scope TEXT NOT NULL,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
-        """)
+            );
 
-        # Tasks table
-        cursor.execute("""
+            -- Tasks table
             CREATE TABLE IF NOT EXISTS tasks (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 project_id TEXT NOT NULL,
@@ -57,11 +287,9 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 completed_at TIMESTAMP,
                 FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
-            )
-        """)
+            );
 
-        # Sessions table
-        cursor.execute("""
+            -- Sessions table
             CREATE TABLE IF NOT EXISTS sessions (
                 id TEXT PRIMARY KEY,
                 project_id TEXT NOT NULL,
@@ -70,11 +298,9 @@ class Database:
                 ended_at TIMESTAMP,
                 tasks_completed INTEGER DEFAULT 0,
                 FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE
-            )
-        """)
+            );
 
-        # Learnings table
-        cursor.execute("""
+            -- Learnings table
             CREATE TABLE IF NOT EXISTS learnings (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 project_id TEXT,
@@ -84,28 +310,46 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 FOREIGN KEY (project_id) REFERENCES projects(id) ON DELETE CASCADE,
                 FOREIGN KEY (session_id) REFERENCES sessions(id) ON DELETE CASCADE
-            )
-        """)
+            );
 
-        # Templates table
-        cursor.execute("""
+            -- Templates table
             CREATE TABLE IF NOT EXISTS templates (
                 name TEXT PRIMARY KEY,
                 content TEXT NOT NULL,
                 variables TEXT,
                 usage_count INTEGER DEFAULT 0,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-            )
+            );
+
+            -- Indexes
+            -- Serves project lookups, status filters and created_at ordering;
+            -- supersedes the old single-column task indexes
+            CREATE INDEX IF NOT EXISTS idx_tasks_project_status_created
+                ON tasks(project_id, status, created_at);
+            DROP INDEX IF EXISTS idx_tasks_project;
+            DROP INDEX IF EXISTS idx_tasks_status;
+            CREATE INDEX IF NOT EXISTS idx_sessions_project ON sessions(project_id);
+            -- Partial index holding only active sessions
+            CREATE INDEX IF NOT EXISTS idx_sessions_active
+                ON sessions(project_id, started_at) WHERE ended_at IS NULL;
+            CREATE INDEX IF NOT EXISTS idx_learnings_project ON learnings(project_id);
+
+            -- Keep projects.updated_at current in the same transaction as task writes
+            CREATE TRIGGER IF NOT EXISTS tasks_touch_project_insert
+            AFTER INSERT ON tasks
+            BEGIN
+                UPDATE projects SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.project_id;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS tasks_touch_project_update
+            AFTER UPDATE ON tasks
+            BEGIN
+                UPDATE projects SET updated_at = CURRENT_TIMESTAMP WHERE id = NEW.project_id;
+            END;
+
+            COMMIT;
         """)
 
-        # Create indexes
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_project ON tasks(project_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_sessions_project ON sessions(project_id)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_learnings_project ON learnings(project_id)")
-
-        self.conn.commit()
-
     # Project operations
 
     def create_project(self, name: str, scope: str) -> str:
@@ -119,12 +363,8 @@ class Database:
             Project ID
         """
         project_id = str(uuid.uuid4())
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO projects (id, name, scope) VALUES (?, ?, ?)",
-            (project_id, name, scope)
-        )
-        self.conn.commit()
+        self.conn.execute(_SQL_INSERT_PROJECT, (project_id, name, scope))
+        self._commit()
         return project_id
 
     def get_project(self, name: str = None, project_id: str = None) -> Optional[Dict]:
@@ -137,22 +377,25 @@ class Database:
         Returns:
             Project dict or None
         """
-        cursor = self.conn.cursor()
         if project_id:
-            cursor.execute("SELECT * FROM projects WHERE id = ?", (project_id,))
+            cursor = self.conn.execute(_SQL_GET_PROJECT_BY_ID, (project_id,))
         elif name:
-            cursor.execute("SELECT * FROM projects WHERE name = ?", (name,))
+            cursor = self.conn.execute(_SQL_GET_PROJECT_BY_NAME, (name,))
         else:
             return None
 
         row = cursor.fetchone()
         return dict(row) if row else None
 
+    def iter_projects(self) -> Iterator[Dict]:
+        """Yield all projects ordered by most recently updated."""
+        cursor = self.conn.execute(_SQL_GET_ALL_PROJECTS)
+        for row in cursor:
+            yield dict(row)
+
     def get_all_projects(self) -> List[Dict]:
         """Get all projects ordered by most recently updated."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM projects ORDER BY updated_at DESC")
-        return [dict(row) for row in cursor.fetchall()]
+        return list(self.iter_projects())
 
     def update_project(self, project_id: str, **kwargs):
         """Update project fields.
@@ -164,21 +407,19 @@ class Database:
         if not kwargs:
             return
 
-        fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
-        values = list(kwargs.values()) + [project_id]
+        columns = tuple(sorted(kwargs))
+        values = [kwargs[column] for column in columns] + [project_id]
 
-        cursor = self.conn.cursor()
-        cursor.execute(
-            f"UPDATE projects SET {fields}, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        self.conn.execute(
+            _build_update_sql("projects", columns, "updated_at = CURRENT_TIMESTAMP"),
             values
         )
-        self.conn.commit()
+        self._commit()
 
     def delete_project(self, project_id: str):
         """Delete a project and all associated data."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM projects WHERE id = ?", (project_id,))
-        self.conn.commit()
+        self.conn.execute(_SQL_DELETE_PROJECT, (project_id,))
+        self._commit()
 
     # Task operations
 
@@ -200,18 +441,63 @@ class Database:
         Returns:
             Task ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """INSERT INTO tasks (project_id, description, status, is_scope_creep)
-               VALUES (?, ?, ?, ?)""",
+        cursor = self.conn.execute(
+            _SQL_INSERT_TASK,
             (project_id, description, status, is_scope_creep)
         )
-        self.conn.commit()
+        self._commit()
+        return cursor.lastrowid
 
-        # Update project timestamp
-        self._touch_project(project_id)
+    def add_tasks(
+        self,
+        project_id: str,
+        tasks: List[Tuple[str, bool, str]]
+    ) -> List[int]:
+        """Add many tasks to a project in a single transaction.
 
-        return cursor.lastrowid
+        Args:
+            project_id: Project ID
+            tasks: (description, is_scope_creep, status) tuples
+
+        Returns:
+            Task IDs, in the same order as the input
+        """
+        if not tasks:
+            return []
+
+        with self.transaction():
+            self.conn.executemany(
+                _SQL_INSERT_TASK,
+                [(project_id, description, status, is_scope_creep)
+                 for description, is_scope_creep, status in tasks]
+            )
+            # AUTOINCREMENT ids are consecutive within one write transaction
+            last_id = self.conn.execute(_SQL_LAST_INSERT_ROWID).fetchone()[0]
+
+        return list(range(last_id - len(tasks) + 1, last_id + 1))
+
+    def iter_tasks(
+        self,
+        project_id: str,
+        status: str = None,
+        include_scope_creep: bool = True
+    ) -> Iterator[Dict]:
+        """Yield tasks for a project lazily, one dict per row.
+
+        Args:
+            project_id: Project ID
+            status: Filter by status (optional)
+            include_scope_creep: Include scope creep tasks
+
+        Yields:
+            Task dicts
+        """
+        query = _SQL_GET_TASKS[bool(status), not include_scope_creep]
+        params = (project_id, status) if status else (project_id,)
+
+        cursor = self.conn.execute(query, params)
+        for row in cursor:
+            yield dict(row)
 
     def get_tasks(
         self,
@@ -229,55 +515,74 @@ class Database:
         Returns:
             List of task dicts
         """
-        cursor = self.conn.cursor()
+        return list(self.iter_tasks(project_id, status, include_scope_creep))
+
+    def get_tasks_completed_since(self, project_id: str, since: str) -> List[Dict]:
+        """Get a project's tasks completed at or after a point in time.
 
-        query = "SELECT * FROM tasks WHERE project_id = ?"
-        params = [project_id]
+        Args:
+            project_id: Project ID
+            since: ISO 8601 timestamp; compared via julianday() because
+                completed_at is stored by datetime.isoformat() with a 'T' separator
 
-        if status:
-            query += " AND status = ?"
-            params.append(status)
+        Returns:
+            List of task dicts
+        """
+        cursor = self.conn.execute(
+            _SQL_GET_TASKS_COMPLETED_SINCE, (project_id, since)
+        )
+        return [dict(row) for row in cursor.fetchall()]
 
-        if not include_scope_creep:
-            query += " AND is_scope_creep = 0"
+    def get_tasks_by_statuses(self, project_id: str, statuses: List[str]) -> List[Dict]:
+        """Get a project's tasks matching any of several statuses in one query.
 
-        query += " ORDER BY created_at ASC"
+        Args:
+            project_id: Project ID
+            statuses: Statuses to include
 
-        cursor.execute(query, params)
+        Returns:
+            List of task dicts (oldest first)
+        """
+        if not statuses:
+            return []
+
+        placeholders = ", ".join("?" for _ in statuses)
+        cursor = self.conn.execute(
+            f"""SELECT * FROM tasks
+                WHERE project_id = ? AND status IN ({placeholders})
+                ORDER BY created_at ASC, id ASC""",
+            [project_id] + list(statuses)
+        )
         return [dict(row) for row in cursor.fetchall()]
 
-    def update_task(self, task_id: int, **kwargs):
+    def update_task(self, task_id: int, **kwargs) -> bool:
         """Update task fields.
 
         Args:
             task_id: Task ID
             **kwargs: Fields to update (status, description, etc.)
+
+        Returns:
+            True if the task exists and was updated
         """
         if not kwargs:
-            return
+            return False
 
         # Auto-set completed_at when status changes to completed
         if kwargs.get('status') == 'completed' and 'completed_at' not in kwargs:
             kwargs['completed_at'] = datetime.now().isoformat()
 
-        fields = ", ".join(f"{k} = ?" for k in kwargs.keys())
-        values = list(kwargs.values()) + [task_id]
-
-        cursor = self.conn.cursor()
-        cursor.execute(f"UPDATE tasks SET {fields} WHERE id = ?", values)
-        self.conn.commit()
+        columns = tuple(sorted(kwargs))
+        values = [kwargs[column] for column in columns] + [task_id]
 
-        # Update project timestamp
-        cursor.execute("SELECT project_id FROM tasks WHERE id = ?", (task_id,))
-        row = cursor.fetchone()
-        if row:
-            self._touch_project(row[0])
+        cursor = self.conn.execute(_build_update_sql("tasks", columns), values)
+        self._commit()
+        return cursor.rowcount > 0
 
     def delete_task(self, task_id: int):
         """Delete a task."""
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM tasks WHERE id = ?", (task_id,))
-        self.conn.commit()
+        self.conn.execute(_SQL_DELETE_TASK, (task_id,))
+        self._commit()
 
     def get_task_stats(self, project_id: str) -> Dict[str, int]:
         """Get task statistics for a project.
@@ -285,28 +590,57 @@ class Database:
         Returns:
             Dict with counts by status
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """SELECT status, COUNT(*) as count
-               FROM tasks
-               WHERE project_id = ?
-               GROUP BY status""",
-            (project_id,)
-        )
+        return dict(self.conn.execute(_SQL_TASK_STATS, (project_id,)).fetchone())
 
-        stats = {
-            'pending': 0,
-            'in_progress': 0,
-            'completed': 0,
-            'blocked': 0,
-            'total': 0
-        }
+    def get_all_task_stats(self) -> Dict[str, Dict[str, int]]:
+        """Get task statistics for every project in a single query.
 
+        Returns:
+            Dict mapping project ID to counts by status
+        """
+        cursor = self.conn.execute(_SQL_ALL_TASK_STATS)
+
+        all_stats = {}
         for row in cursor.fetchall():
+            stats = all_stats.setdefault(row['project_id'], {
+                'pending': 0,
+                'in_progress': 0,
+                'completed': 0,
+                'blocked': 0,
+                'total': 0
+            })
+            if row['status'] is None:
+                continue
             stats[row['status']] = row['count']
             stats['total'] += row['count']
 
-        return stats
+        return all_stats
+
+    def get_tasks_for_projects(self, project_ids: List[str]) -> Dict[str, List[Dict]]:
+        """Get tasks for several projects in a single query.
+
+        Args:
+            project_ids: Project IDs
+
+        Returns:
+            Dict mapping project ID to its task dicts (oldest first)
+        """
+        tasks_by_project = {project_id: [] for project_id in project_ids}
+        if not project_ids:
+            return tasks_by_project
+
+        placeholders = ", ".join("?" for _ in project_ids)
+        cursor = self.conn.execute(
+            f"""SELECT * FROM tasks
+                WHERE project_id IN ({placeholders})
+                ORDER BY created_at ASC, id ASC""",
+            list(project_ids)
+        )
+
+        for row in cursor.fetchall():
+            tasks_by_project[row['project_id']].append(dict(row))
+
+        return tasks_by_project
 
     # Session operations
 
@@ -321,16 +655,11 @@ class Database:
             Session ID
         """
         if machine_id is None:
-            import socket
-            machine_id = socket.gethostname()
+            machine_id = _DEFAULT_MACHINE_ID
 
         session_id = str(uuid.uuid4())
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "INSERT INTO sessions (id, project_id, machine_id) VALUES (?, ?, ?)",
-            (session_id, project_id, machine_id)
-        )
-        self.conn.commit()
+        self.conn.execute(_SQL_INSERT_SESSION, (session_id, project_id, machine_id))
+        self._commit()
         return session_id
 
     def end_session(self, session_id: str):
@@ -339,17 +668,14 @@ class Database:
         Args:
             session_id: Session ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE sessions SET ended_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (session_id,)
-        )
-        self.conn.commit()
+        self.flush_counters()
+        self.conn.execute(_SQL_END_SESSION, (session_id,))
+        self._commit()
 
     def get_session(self, session_id: str) -> Optional[Dict]:
         """Get session by ID."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM sessions WHERE id = ?", (session_id,))
+        self.flush_counters()
+        cursor = self.conn.execute(_SQL_GET_SESSION, (session_id,))
         row = cursor.fetchone()
         return dict(row) if row else None
 
@@ -359,28 +685,77 @@ class Database:
         Args:
             project_id: Filter by project (optional)
         """
-        cursor = self.conn.cursor()
+        self.flush_counters()
+        query = _SQL_GET_ACTIVE_SESSIONS[bool(project_id)]
+        params = (project_id,) if project_id else ()
 
-        query = "SELECT * FROM sessions WHERE ended_at IS NULL"
-        params = []
+        cursor = self.conn.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
 
-        if project_id:
-            query += " AND project_id = ?"
-            params.append(project_id)
+    def iter_sessions(
+        self,
+        project_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterator[Dict]:
+        """Yield a project's sessions lazily, active ones first.
 
-        query += " ORDER BY started_at DESC"
+        Args:
+            project_id: Project ID
+            limit: Max number to return (optional)
+            offset: Number of sessions to skip
 
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        Yields:
+            Session dicts
+        """
+        self.flush_counters()
+        cursor = self.conn.execute(
+            _SQL_GET_PROJECT_SESSIONS,
+            (project_id, -1 if limit is None else limit, offset)
+        )
+        for row in cursor:
+            yield dict(row)
+
+    def get_sessions(
+        self,
+        project_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
+        """Get a project's sessions, active ones first.
+
+        Args:
+            project_id: Project ID
+            limit: Max number to return (optional)
+            offset: Number of sessions to skip
+        """
+        return list(self.iter_sessions(project_id, limit, offset))
+
+    def get_session_time_summary(self, project_id: str) -> Dict:
+        """Get session count and total session hours for a project.
+
+        Active sessions count up to the current time.
+
+        Args:
+            project_id: Project ID
+
+        Returns:
+            Dict with session_count and total_hours
+        """
+        cursor = self.conn.execute(_SQL_SESSION_TIME_SUMMARY, (project_id,))
+        return dict(cursor.fetchone())
 
     def increment_session_tasks(self, session_id: str):
-        """Increment completed tasks counter for session."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE sessions SET tasks_completed = tasks_completed + 1 WHERE id = ?",
-            (session_id,)
-        )
-        self.conn.commit()
+        """Increment completed tasks counter for session.
+
+        The increment is buffered; see flush_counters(). Inside a
+        transaction() block it is written immediately instead.
+        """
+        if self._transaction_depth:
+            self.conn.execute(_SQL_ADD_SESSION_TASKS, (1, session_id))
+            return
+        self._pending_session_tasks[session_id] += 1
+        self._count_pending_increment()
 
     # Learning operations
 
@@ -402,15 +777,59 @@ class Database:
         Returns:
             Learning ID
         """
-        cursor = self.conn.cursor()
-        cursor.execute(
-            """INSERT INTO learnings (pattern, context, project_id, session_id)
-               VALUES (?, ?, ?, ?)""",
+        cursor = self.conn.execute(
+            _SQL_INSERT_LEARNING,
             (pattern, context, project_id, session_id)
         )
-        self.conn.commit()
+        self._commit()
         return cursor.lastrowid
 
+    def add_learnings(
+        self,
+        learnings: List[Tuple[str, Optional[str], Optional[str], Optional[str]]]
+    ) -> List[int]:
+        """Add many learnings in a single transaction.
+
+        Args:
+            learnings: (pattern, context, project_id, session_id) tuples
+
+        Returns:
+            Learning IDs, in the same order as the input
+        """
+        if not learnings:
+            return []
+
+        with self.transaction():
+            self.conn.executemany(_SQL_INSERT_LEARNING, learnings)
+            # AUTOINCREMENT ids are consecutive within one write transaction
+            last_id = self.conn.execute(_SQL_LAST_INSERT_ROWID).fetchone()[0]
+
+        return list(range(last_id - len(learnings) + 1, last_id + 1))
+
+    def iter_learnings(
+        self,
+        project_id: str = None,
+        session_id: str = None,
+        limit: int = 10
+    ) -> Iterator[Dict]:
+        """Yield learnings lazily, newest first.
+
+        Args:
+            project_id: Filter by project (optional)
+            session_id: Filter by session (optional)
+            limit: Max number to return
+
+        Yields:
+            Learning dicts
+        """
+        query = _SQL_GET_LEARNINGS[bool(project_id), bool(session_id)]
+        params = [value for value in (project_id, session_id) if value]
+        params.append(limit)
+
+        cursor = self.conn.execute(query, params)
+        for row in cursor:
+            yield dict(row)
+
     def get_learnings(
         self,
         project_id: str = None,
@@ -427,24 +846,7 @@ class Database:
         Returns:
             List of learning dicts
         """
-        cursor = self.conn.cursor()
-
-        query = "SELECT * FROM learnings WHERE 1=1"
-        params = []
-
-        if project_id:
-            query += " AND project_id = ?"
-            params.append(project_id)
-
-        if session_id:
-            query += " AND session_id = ?"
-            params.append(session_id)
-
-        query += " ORDER BY created_at DESC LIMIT ?"
-        params.append(limit)
-
-        cursor.execute(query, params)
-        return [dict(row) for row in cursor.fetchall()]
+        return list(self.iter_learnings(project_id, session_id, limit))
 
     # Template operations
 
@@ -456,65 +858,102 @@ class Database:
             content: Template content
             variables: List of variable names
         """
-        cursor = self.conn.cursor()
         variables_json = json.dumps(variables) if variables else None
-
-        cursor.execute(
-            """INSERT OR REPLACE INTO templates (name, content, variables)
-               VALUES (?, ?, ?)""",
-            (name, content, variables_json)
-        )
-        self.conn.commit()
+        self.conn.execute(_SQL_UPSERT_TEMPLATE, (name, content, variables_json))
+        self._commit()
 
     def get_template(self, name: str) -> Optional[Dict]:
         """Get template by name."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM templates WHERE name = ?", (name,))
+        self.flush_counters()
+        cursor = self.conn.execute(_SQL_GET_TEMPLATE, (name,))
         row = cursor.fetchone()
-
-        if row:
-            result = dict(row)
-            if result.get('variables'):
-                result['variables'] = json.loads(result['variables'])
-            return result
-        return None
+        return _template_from_row(row) if row else None
 
     def get_all_templates(self) -> List[Dict]:
         """Get all templates."""
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT * FROM templates ORDER BY usage_count DESC, name ASC")
+        self.flush_counters()
+        cursor = self.conn.execute(_SQL_GET_ALL_TEMPLATES)
+        return [_template_from_row(row) for row in cursor]
 
-        results = []
-        for row in cursor.fetchall():
-            result = dict(row)
-            if result.get('variables'):
-                result['variables'] = json.loads(result['variables'])
-            results.append(result)
+    def increment_template_usage(self, name: str):
+        """Increment template usage counter.
 
-        return results
+        The increment is buffered; see flush_counters(). Inside a
+        transaction() block it is written immediately instead.
+        """
+        if self._transaction_depth:
+            self.conn.execute(_SQL_ADD_TEMPLATE_USAGE, (1, name))
+            return
+        self._pending_template_usage[name] += 1
+        self._count_pending_increment()
+
+    def _count_pending_increment(self):
+        """Track a buffered increment, flushing once enough have piled up."""
+        self._pending_increments += 1
+        if self._pending_increments >= self.COUNTER_FLUSH_THRESHOLD:
+            self.flush_counters()
+
+    def flush_counters(self):
+        """Write buffered session/template counter increments.
+
+        All pending increments are applied in one transaction. Reads of
+        sessions and templates flush first, so callers never see stale counts.
+        The buffer is only cleared once that transaction has committed; inside
+        a transaction() block this does nothing, since increments made there
+        bypass the buffer and the block flushes it before it begins.
+        """
+        if not self._pending_increments or self._transaction_depth:
+            return
 
-    def increment_template_usage(self, name: str):
-        """Increment template usage counter."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE templates SET usage_count = usage_count + 1 WHERE name = ?",
-            (name,)
-        )
-        self.conn.commit()
+        with self.conn:
+            self.conn.executemany(
+                _SQL_ADD_SESSION_TASKS,
+                [(count, session_id)
+                 for session_id, count in self._pending_session_tasks.items()]
+            )
+            self.conn.executemany(
+                _SQL_ADD_TEMPLATE_USAGE,
+                [(count, name) for name, count in self._pending_template_usage.items()]
+            )
+
+        self._pending_session_tasks.clear()
+        self._pending_template_usage.clear()
+        self._pending_increments = 0
 
     # Helper methods
 
-    def _touch_project(self, project_id: str):
-        """Update project's updated_at timestamp."""
-        cursor = self.conn.cursor()
-        cursor.execute(
-            "UPDATE projects SET updated_at = CURRENT_TIMESTAMP WHERE id = ?",
-            (project_id,)
-        )
-        self.conn.commit()
+    def get_data_version(self) -> Tuple[int, int]:
+        """Get a token that changes whenever the database is modified.
+
+        Combines this connection's change counter with SQLite's data_version,
+        which advances when other connections commit.
+
+        Returns:
+            Opaque tuple suitable for cache keys
+        """
+        data_version = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return self.conn.total_changes, data_version
+
+    def _finish(self):
+        """Write buffered counters and refresh planner statistics.
+
+        Runs from close(), or at process exit for callers that never close
+        the database. PRAGMA optimize only re-analyzes tables whose contents
+        changed noticeably during this connection.
+        """
+        self.flush_counters()
+        self.conn.execute("PRAGMA optimize")
 
     def close(self):
-        """Close database connection."""
+        """Close database connection, writing any buffered counters first.
+
+        Closing an already closed database does nothing.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        _open_databases.discard(self)
+        self._finish()
         self.conn.close()
 
     def __enter__(self):
@@ -1,7 +1,53 @@
 """Progress monitoring and productivity analytics."""
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timedelta
+from functools import lru_cache
+
+from .state import ProjectState
+
+
+# Health status by minimum score, highest threshold first
+_HEALTH_STATUS_BUCKETS = (
+    (80, 'healthy'),
+    (60, 'needs_attention'),
+    (40, 'at_risk'),
+    (0, 'critical')
+)
+
+
+@lru_cache(maxsize=4096)
+def _parse_iso(timestamp: str) -> datetime:
+    """Parse an ISO-8601 timestamp, memoized across rows and calls."""
+    return datetime.fromisoformat(timestamp)
+
+
+def _db_timestamp(moment: datetime) -> str:
+    """Format a datetime like SQLite's CURRENT_TIMESTAMP.
+
+    Columns defaulting to CURRENT_TIMESTAMP (created_at, started_at) share
+    this fixed-width layout, so they compare chronologically as plain
+    strings. completed_at is written by datetime.isoformat() and is not.
+    """
+    return moment.isoformat(sep=' ', timespec='seconds')
+
+
+def _bucketize_tasks(tasks: List[Dict]) -> Tuple[Dict[str, List[Dict]], List[Dict]]:
+    """Group tasks by status and collect scope creep tasks in one pass.
+
+    Args:
+        tasks: Task dicts
+
+    Returns:
+        Tuple of (tasks by status, scope creep tasks)
+    """
+    by_status = {'pending': [], 'in_progress': [], 'completed': [], 'blocked': []}
+    scope_creep = []
+    for task in tasks:
+        by_status.setdefault(task['status'], []).append(task)
+        if task['is_scope_creep']:
+            scope_creep.append(task)
+    return by_status, scope_creep
 
 
 class ProgressMonitor:
@@ -28,11 +74,22 @@ class ProgressMonitor:
         if not session:
             return {'error': 'Session not found'}
 
+        return self._analyze_session_row(session)
+
+    def _analyze_session_row(self, session: Dict) -> Dict:
+        """Compute session metrics from an already-fetched session row.
+
+        Args:
+            session: Session dict
+
+        Returns:
+            Dict with session metrics
+        """
         # Calculate duration
-        started = datetime.fromisoformat(session['started_at'])
+        started = _parse_iso(session['started_at'])
 
         if session.get('ended_at'):
-            ended = datetime.fromisoformat(session['ended_at'])
+            ended = _parse_iso(session['ended_at'])
             duration = (ended - started).total_seconds() / 3600  # hours
             is_active = False
         else:
@@ -47,7 +104,7 @@ class ProgressMonitor:
         tasks_per_hour = tasks_completed / duration if duration > 0 else 0
 
         return {
-            'session_id': session_id,
+            'session_id': session['id'],
             'project_id': session['project_id'],
             'machine_id': session['machine_id'],
             'started_at': session['started_at'],
@@ -58,37 +115,68 @@ class ProgressMonitor:
             'is_active': is_active
         }
 
-    def get_project_sessions(self, project_id: str) -> List[Dict]:
+    def iter_project_sessions(
+        self,
+        project_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> Iterator[Dict]:
+        """Yield session analytics for a project, active sessions first.
+
+        Args:
+            project_id: Project ID
+            limit: Max number of sessions (optional)
+            offset: Number of sessions to skip
+
+        Yields:
+            Session analytics
+        """
+        # Active and ended sessions in one query; rows are analyzed as fetched
+        for session in self.db.iter_sessions(project_id, limit, offset):
+            yield self._analyze_session_row(session)
+
+    def get_project_sessions(
+        self,
+        project_id: str,
+        limit: Optional[int] = None,
+        offset: int = 0
+    ) -> List[Dict]:
         """Get all sessions for a project with analytics.
 
         Args:
             project_id: Project ID
+            limit: Max number of sessions (optional)
+            offset: Number of sessions to skip
 
         Returns:
             List of session analytics
         """
-        # Get all sessions (active and ended)
-        active_sessions = self.db.get_active_sessions(project_id)
-
-        # Get ended sessions (need custom query)
-        cursor = self.db.conn.cursor()
-        cursor.execute(
-            """SELECT * FROM sessions
-               WHERE project_id = ? AND ended_at IS NOT NULL
-               ORDER BY started_at DESC""",
-            (project_id,)
-        )
-        ended_sessions = [dict(row) for row in cursor.fetchall()]
+        return list(self.iter_project_sessions(project_id, limit, offset))
+
+    def _load_project_snapshot(self, project_id: str) -> Dict:
+        """Load a project's tasks once and partition them for analysis.
+
+        Args:
+            project_id: Project ID
 
-        all_sessions = active_sessions + ended_sessions
+        Returns:
+            Dict with the project row, all tasks, tasks grouped by status,
+            scope creep tasks and per-status counts
+        """
+        tasks = self.db.get_tasks(project_id, include_scope_creep=True)
+        by_status, scope_creep = _bucketize_tasks(tasks)
 
-        # Analyze each session
-        analytics = []
-        for session in all_sessions:
-            session_data = self.analyze_session(session['id'])
-            analytics.append(session_data)
+        stats = {status: len(by_status[status])
+                 for status in ('pending', 'in_progress', 'completed', 'blocked')}
+        stats['total'] = len(tasks)
 
-        return analytics
+        return {
+            'project': self.db.get_project(project_id=project_id),
+            'tasks': tasks,
+            'by_status': by_status,
+            'scope_creep': scope_creep,
+            'stats': stats
+        }
 
     def suggest_next_action(self, project_id: str) -> Dict:
         """Suggest concrete next action.
@@ -99,30 +187,33 @@ class ProgressMonitor:
         Returns:
             Dict with suggestion
         """
-        from .state import ProjectState
-
         state = ProjectState(project_id, self.db)
         return state.suggest_next_action()
 
-    def detect_stuck_patterns(self, project_id: str) -> List[Dict]:
+    def detect_stuck_patterns(self, project_id: str, snapshot: Dict = None) -> List[Dict]:
         """Detect if project is stuck.
 
         Args:
             project_id: Project ID
+            snapshot: Preloaded project snapshot (optional)
 
         Returns:
             List of stuck indicators
         """
+        if snapshot is None:
+            snapshot = self._load_project_snapshot(project_id)
+
         indicators = []
+        now = datetime.now()
 
         # Check for long-running in-progress tasks
-        in_progress = self.db.get_tasks(project_id, status='in_progress')
+        in_progress = snapshot['by_status']['in_progress']
+        stuck_before = _db_timestamp(now - timedelta(hours=24))
 
         for task in in_progress:
-            created = datetime.fromisoformat(task['created_at'])
-            age_hours = (datetime.now() - created).total_seconds() / 3600
-
-            if age_hours > 24:  # Task in progress for more than 24 hours
+            if task['created_at'] < stuck_before:  # In progress for more than 24 hours
+                created = _parse_iso(task['created_at'])
+                age_hours = (now - created).total_seconds() / 3600
                 indicators.append({
                     'type': 'long_running_task',
                     'severity': 'high',
@@ -133,7 +224,7 @@ class ProgressMonitor:
                 })
 
         # Check for many blocked tasks
-        blocked = self.db.get_tasks(project_id, status='blocked')
+        blocked = snapshot['by_status']['blocked']
         if len(blocked) > 3:
             indicators.append({
                 'type': 'many_blocked_tasks',
@@ -143,11 +234,11 @@ class ProgressMonitor:
             })
 
         # Check for no recent progress
-        stats = self.db.get_task_stats(project_id)
+        stats = snapshot['stats']
         if stats['completed'] == 0 and stats['total'] > 0:
-            project = self.db.get_project(project_id=project_id)
-            created = datetime.fromisoformat(project['created_at'])
-            age_days = (datetime.now() - created).days
+            project = snapshot['project']
+            created = _parse_iso(project['created_at'])
+            age_days = (now - created).days
 
             if age_days > 1:
                 indicators.append({
@@ -158,8 +249,8 @@ class ProgressMonitor:
                 })
 
         # Check for scope creep
-        all_tasks = self.db.get_tasks(project_id, include_scope_creep=True)
-        scope_creep_tasks = [t for t in all_tasks if t['is_scope_creep']]
+        all_tasks = snapshot['tasks']
+        scope_creep_tasks = snapshot['scope_creep']
 
         if scope_creep_tasks:
             indicators.append({
@@ -172,32 +263,35 @@ class ProgressMonitor:
 
         return indicators
 
-    def get_velocity(self, project_id: str, days: int = 7) -> Dict:
+    def get_velocity(self, project_id: str, days: int = 7, snapshot: Dict = None) -> Dict:
         """Calculate project velocity.
 
         Args:
             project_id: Project ID
             days: Number of days to analyze
+            snapshot: Preloaded project snapshot (optional)
 
         Returns:
             Dict with velocity metrics
         """
-        # Get completed tasks in time window
-        completed = self.db.get_tasks(project_id, status='completed')
-
-        cutoff = datetime.now() - timedelta(days=days)
+        since = datetime.now() - timedelta(days=days)
 
-        recent_completed = [
-            t for t in completed
-            if t.get('completed_at') and
-            datetime.fromisoformat(t['completed_at']) >= cutoff
-        ]
+        # Get completed tasks in time window
+        if snapshot is None:
+            # Standalone call: let SQLite filter rather than loading all tasks
+            recent_completed = self.db.get_tasks_completed_since(project_id, since.isoformat())
+            stats = self.db.get_task_stats(project_id)
+        else:
+            recent_completed = [
+                t for t in snapshot['by_status']['completed']
+                if t.get('completed_at') and _parse_iso(t['completed_at']) >= since
+            ]
+            stats = snapshot['stats']
 
         # Calculate velocity
         tasks_per_day = len(recent_completed) / days if days > 0 else 0
 
         # Estimate remaining time
-        stats = self.db.get_task_stats(project_id)
         remaining = stats['pending'] + stats['in_progress']
 
         if tasks_per_day > 0:
@@ -215,15 +309,27 @@ class ProgressMonitor:
             )
         }
 
-    def get_project_health(self, project_id: str) -> Dict:
+    def get_project_health(
+        self,
+        project_id: str,
+        snapshot: Dict = None,
+        stuck_patterns: List[Dict] = None,
+        velocity: Dict = None
+    ) -> Dict:
         """Get overall project health score.
 
         Args:
             project_id: Project ID
+            snapshot: Preloaded project snapshot (optional)
+            stuck_patterns: Precomputed detect_stuck_patterns() result (optional)
+            velocity: Precomputed get_velocity() result (optional)
 
         Returns:
             Dict with health metrics
         """
+        if snapshot is None:
+            snapshot = self._load_project_snapshot(project_id)
+
         health = {
             'score': 100,
             'status': 'healthy',
@@ -231,7 +337,7 @@ class ProgressMonitor:
         }
 
         # Check various health indicators
-        stats = self.db.get_task_stats(project_id)
+        stats = snapshot['stats']
 
         # Penalize for blocked tasks
         if stats['blocked'] > 0:
@@ -241,7 +347,8 @@ class ProgressMonitor:
             health['issues'].append(f"{stats['blocked']} blocked tasks")
 
         # Penalize for stuck patterns
-        stuck_patterns = self.detect_stuck_patterns(project_id)
+        if stuck_patterns is None:
+            stuck_patterns = self.detect_stuck_patterns(project_id, snapshot)
         if stuck_patterns:
             high_severity = sum(1 for p in stuck_patterns if p['severity'] == 'high')
             penalty = high_severity * 15 + (len(stuck_patterns) - high_severity) * 5
@@ -249,14 +356,15 @@ class ProgressMonitor:
             health['issues'].append(f"{len(stuck_patterns)} stuck indicators")
 
         # Check velocity
-        velocity = self.get_velocity(project_id)
+        if velocity is None:
+            velocity = self.get_velocity(project_id, snapshot=snapshot)
         if velocity['tasks_per_day'] < 0.5:  # Less than 1 task per 2 days
             health['score'] -= 10
             health['issues'].append("Low velocity")
 
         # Check scope compliance
-        all_tasks = self.db.get_tasks(project_id, include_scope_creep=True)
-        scope_creep = [t for t in all_tasks if t['is_scope_creep']]
+        all_tasks = snapshot['tasks']
+        scope_creep = snapshot['scope_creep']
 
         if scope_creep:
             creep_ratio = len(scope_creep) / len(all_tasks)
@@ -269,38 +377,37 @@ class ProgressMonitor:
         health['score'] = max(0, min(100, health['score']))
 
         # Determine status
-        if health['score'] >= 80:
-            health['status'] = 'healthy'
-        elif health['score'] >= 60:
-            health['status'] = 'needs_attention'
-        elif health['score'] >= 40:
-            health['status'] = 'at_risk'
-        else:
-            health['status'] = 'critical'
+        health['status'] = next(
+            label for threshold, label in _HEALTH_STATUS_BUCKETS
+            if health['score'] >= threshold
+        )
 
         return health
 
-    def get_productivity_report(self, project_id: str) -> Dict:
+    def get_productivity_report(self, project_id: str, include_sessions: bool = False) -> Dict:
         """Generate comprehensive productivity report.
 
         Args:
             project_id: Project ID
+            include_sessions: Also list per-session analytics under 'sessions'
 
         Returns:
             Dict with full report
         """
-        project = self.db.get_project(project_id=project_id)
+        snapshot = self._load_project_snapshot(project_id)
+        project = snapshot['project']
         if not project:
             return {'error': 'Project not found'}
 
-        stats = self.db.get_task_stats(project_id)
-        velocity = self.get_velocity(project_id)
-        health = self.get_project_health(project_id)
-        stuck_patterns = self.detect_stuck_patterns(project_id)
-        sessions = self.get_project_sessions(project_id)
+        stats = snapshot['stats']
+        velocity = self.get_velocity(project_id, snapshot=snapshot)
+        stuck_patterns = self.detect_stuck_patterns(project_id, snapshot)
+        health = self.get_project_health(project_id, snapshot, stuck_patterns, velocity)
 
-        # Calculate total time spent
-        total_hours = sum(s['duration_hours'] for s in sessions)
+        # Total time spent, aggregated in SQL
+        time_summary = self.db.get_session_time_summary(project_id)
+        total_hours = time_summary['total_hours']
+        session_count = time_summary['session_count']
 
         # Calculate completion percentage
         completion_pct = (
@@ -308,7 +415,7 @@ class ProgressMonitor:
             if stats['total'] > 0 else 0
         )
 
-        return {
+        report = {
             'project': {
                 'id': project_id,
                 'name': project['name'],
@@ -327,10 +434,10 @@ class ProgressMonitor:
             'stuck_patterns': stuck_patterns,
             'time': {
                 'total_hours': round(total_hours, 2),
-                'session_count': len(sessions),
+                'session_count': session_count,
                 'avg_session_hours': (
-                    round(total_hours / len(sessions), 2)
-                    if sessions else 0
+                    round(total_hours / session_count, 2)
+                    if session_count else 0
                 )
             },
             'status_breakdown': {
@@ -341,6 +448,11 @@ class ProgressMonitor:
             }
         }
 
+        if include_sessions:
+            report['sessions'] = self.get_project_sessions(project_id)
+
+        return report
+
     def get_recommendations(self, project_id: str) -> List[str]:
         """Get actionable recommendations.
 
@@ -353,10 +465,11 @@ class ProgressMonitor:
         recommendations = []
 
         # Get health metrics
-        health = self.get_project_health(project_id)
-        stats = self.db.get_task_stats(project_id)
-        stuck_patterns = self.detect_stuck_patterns(project_id)
-        velocity = self.get_velocity(project_id)
+        snapshot = self._load_project_snapshot(project_id)
+        stats = snapshot['stats']
+        stuck_patterns = self.detect_stuck_patterns(project_id, snapshot)
+        velocity = self.get_velocity(project_id, snapshot=snapshot)
+        health = self.get_project_health(project_id, snapshot, stuck_patterns, velocity)
 
         # Based on health score
         if health['score'] < 60:
@@ -393,8 +506,7 @@ class ProgressMonitor:
             )
 
         # Scope compliance
-        all_tasks = self.db.get_tasks(project_id, include_scope_creep=True)
-        scope_creep = [t for t in all_tasks if t['is_scope_creep']]
+        scope_creep = snapshot['scope_creep']
 
         if scope_creep:
             recommendations.append(
@@ -409,7 +521,6 @@ class ProgressMonitor:
 
         # If nothing else, suggest next action
         if not recommendations:
-            from .state import ProjectState
             state = ProjectState(project_id, self.db)
             next_action = state.suggest_next_action()
 
@@ -262,14 +262,18 @@ class ProjectState:
     def mark_task_complete(self, task_id: int, session_id: str = None):
         """Mark a task as completed.
 
+        The status change and the session counter increment are committed
+        together; increments made inside a transaction bypass the counter buffer.
+
         Args:
             task_id: Task ID
             session_id: Session ID (to increment counter)
         """
-        self.db.update_task(task_id, status='completed')
+        with self.db.transaction():
+            self.db.update_task(task_id, status='completed')
 
-        if session_id:
-            self.db.increment_session_tasks(session_id)
+            if session_id:
+                self.db.increment_session_tasks(session_id)
 
     def mark_task_blocked(self, task_id: int, reason: str):
         """Mark a task as blocked.
@@ -1,6 +1,7 @@
 """Multi-machine synchronization for Claude Code Conductor."""
 
 import os
+import sqlite3
 import subprocess
 import shutil
 from pathlib import Path
@@ -63,12 +64,31 @@ class Sync:
         except FileNotFoundError:
             return False
 
+    def _checkpoint_database(self):
+        """Fold the write-ahead log back into the database file.
+
+        The database runs in WAL mode, so recent writes may live only in
+        conductor.db-wal, which is never synced. Checkpointing before any
+        copy makes conductor.db self-contained and leaves the log empty, so a
+        pulled file is not shadowed by stale log pages.
+        """
+        if not self.db_path.exists():
+            return
+
+        conn = sqlite3.connect(str(self.db_path))
+        try:
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+
     def push_state(self) -> Dict[str, any]:
         """Push local state to remote.
 
         Returns:
             Dict with sync result
         """
+        self._checkpoint_database()
+
         if self.sync_method == 'git':
             return self._push_git()
         elif self.sync_method == 'dropbox':
@@ -82,6 +102,8 @@ class Sync:
         Returns:
             Dict with sync result
         """
+        self._checkpoint_database()
+
         if self.sync_method == 'git':
             return self._pull_git()
         elif self.sync_method == 'dropbox':
@@ -189,7 +211,7 @@ class Sync:
 
         # Add .gitignore
         gitignore = self.config_dir / ".gitignore"
-        gitignore.write_text("*.log\n*.tmp\n")
+        gitignore.write_text("*.log\n*.tmp\n*.db-wal\n*.db-shm\n")
 
     def _push_dropbox(self) -> Dict[str, any]:
         """Push state using Dropbox."""
@@ -421,6 +443,9 @@ class Sync:
         if not self.db_path.exists():
             return ""
 
+        # Hash the same self-contained file that a push would copy
+        self._checkpoint_database()
+
         sha256 = hashlib.sha256()
 
         with open(self.db_path, 'rb') as f:
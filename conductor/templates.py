@@ -1,10 +1,13 @@
 """Prompt template engine for Claude Code Conductor."""
 
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import re
 from pathlib import Path
 
 
+_VARIABLE_RE = re.compile(r'\{(\w+)\}')
+
+
 class PromptTemplate:
     """Manages prompt templates with variable substitution and context injection."""
 
@@ -184,6 +187,27 @@ Remember: Scope creep kills projects. Stay focused.""",
         Returns:
             Expanded prompt string
         """
+        return "".join(self.expand_iter(template_name, variables, project_context))
+
+    def expand_iter(
+        self,
+        template_name: str,
+        variables: Dict[str, str] = None,
+        project_context: str = None
+    ) -> Iterator[str]:
+        """Expand a template lazily, yielding text segments in order.
+
+        Lookup errors are raised immediately rather than on first iteration,
+        so callers can open output files only once expansion is known to work.
+
+        Args:
+            template_name: Name of template to expand
+            variables: Dict of variable replacements
+            project_context: Project context to inject
+
+        Returns:
+            Iterator over segments of the expanded prompt
+        """
         template_content = self.get_template(template_name)
         if not template_content:
             raise ValueError(f"Template '{template_name}' not found")
@@ -198,18 +222,19 @@ Remember: Scope creep kills projects. Stay focused.""",
         if project_context and 'context' not in variables:
             variables['context'] = project_context
 
-        # Find all required variables
-        required_vars = self._extract_variables(template_content)
+        return self._iter_segments(template_content, variables)
 
-        # Substitute variables
-        result = template_content
-        for var in required_vars:
-            placeholder = f"{{{var}}}"
-            if var in variables:
-                result = result.replace(placeholder, str(variables[var]))
+    def _iter_segments(self, template: str, variables: Dict[str, str]) -> Iterator[str]:
+        """Yield template text with placeholders substituted in a single pass."""
+        pos = 0
+        for match in _VARIABLE_RE.finditer(template):
+            var = match.group(1)
             # Leave placeholder if no value provided (user can fill in)
-
-        return result
+            if var in variables:
+                yield template[pos:match.start()]
+                yield str(variables[var])
+                pos = match.end()
+        yield template[pos:]
 
     def create_template(
         self,
@@ -242,8 +267,7 @@ Remember: Scope creep kills projects. Stay focused.""",
             List of variable names
         """
         # Find all {variable} patterns
-        pattern = r'\{(\w+)\}'
-        matches = re.findall(pattern, template)
+        matches = _VARIABLE_RE.findall(template)
         return sorted(set(matches))
 
     def render_with_context(
@@ -1,8 +1,13 @@
 """Comprehensive tests for Claude Code Conductor."""
 
+import gc
 import unittest
 import tempfile
 import os
+import shutil
+import sqlite3
+import weakref
+from datetime import datetime, timedelta
 from pathlib import Path
 
 from conductor.db import Database
@@ -11,6 +16,7 @@ from conductor.context import ContextManager
 from conductor.state import ProjectState
 from conductor.registry import Registry
 from conductor.monitor import ProgressMonitor
+from conductor.sync import Sync
 
 
 class TestDatabase(unittest.TestCase):
@@ -46,6 +52,75 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(tasks), 1)
         self.assertEqual(tasks[0]['description'], "Test task")
 
+    def test_add_tasks_bulk(self):
+        """Test bulk task creation."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        self.db.add_task(project_id, "Existing task")
+
+        task_ids = self.db.add_tasks(project_id, [
+            ("Task 1", False, 'pending'),
+            ("Task 2", True, 'in_progress'),
+        ])
+
+        tasks = {t['id']: t for t in self.db.get_tasks(project_id)}
+        self.assertEqual(len(tasks), 3)
+        self.assertEqual(tasks[task_ids[0]]['description'], "Task 1")
+        self.assertEqual(tasks[task_ids[1]]['status'], 'in_progress')
+        self.assertTrue(tasks[task_ids[1]]['is_scope_creep'])
+
+    def test_iter_tasks(self):
+        """Test lazy task iteration matches the list API."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        self.db.add_tasks(project_id, [
+            ("Task 1", False, 'pending'),
+            ("Task 2", False, 'pending'),
+        ])
+
+        first = next(self.db.iter_tasks(project_id))
+        self.assertEqual(first['description'], "Task 1")
+        self.assertEqual(list(self.db.iter_tasks(project_id)), self.db.get_tasks(project_id))
+
+    def test_transaction(self):
+        """Test grouped writes commit together and roll back on error."""
+        with self.db.transaction():
+            project_id = self.db.create_project("test-project", "Test scope")
+            self.db.add_task(project_id, "Task 1")
+            self.db.add_tasks(project_id, [("Task 2", False, 'pending')])
+        self.assertEqual(len(self.db.get_tasks(project_id)), 2)
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.add_task(project_id, "Task 3")
+                raise RuntimeError("abort")
+        self.assertEqual(len(self.db.get_tasks(project_id)), 2)
+
+        # A failed write leaves sqlite3's implicit transaction open
+        with self.assertRaises(sqlite3.IntegrityError):
+            self.db.create_project("test-project", "Duplicate")
+        self.db.add_tasks(project_id, [("Task 4", False, 'pending')])
+        self.assertEqual(len(self.db.get_tasks(project_id)), 3)
+
+    def test_reads_see_own_writes(self):
+        """Test reads see this connection's writes, even mid-iteration."""
+        project_id = self.db.create_project("test-project", "Test scope")
+
+        with self.db.transaction():
+            self.db.add_task(project_id, "Task 1")
+            self.assertEqual(len(self.db.get_tasks(project_id)), 1)
+
+        tasks = self.db.iter_tasks(project_id)
+        next(tasks)
+        self.db.add_task(project_id, "Task 2")
+        self.assertEqual(self.db.get_task_stats(project_id)['total'], 2)
+        tasks.close()
+
+    def test_in_memory_database(self):
+        """Test an in-memory database can be opened and used."""
+        with Database(':memory:') as db:
+            project_id = db.create_project("test-project", "Test scope")
+            db.add_task(project_id, "Task 1")
+            self.assertEqual(len(db.get_tasks(project_id)), 1)
+
     def test_task_status_updates(self):
         """Test task status transitions."""
         project_id = self.db.create_project("test-project", "Test scope")
@@ -62,6 +137,9 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(tasks), 1)
         self.assertIsNotNone(tasks[0]['completed_at'])
 
+        # Unknown tasks are reported rather than silently ignored
+        self.assertFalse(self.db.update_task(task_id + 1, status='completed'))
+
     def test_task_stats(self):
         """Test task statistics."""
         project_id = self.db.create_project("test-project", "Test scope")
@@ -76,6 +154,42 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(stats['pending'], 1)
         self.assertEqual(stats['in_progress'], 1)
         self.assertEqual(stats['completed'], 1)
+        self.assertEqual(stats['blocked'], 0)
+
+        # Projects without tasks report zeros rather than NULLs
+        empty_id = self.db.create_project("empty-project", "Test scope")
+        self.assertEqual(self.db.get_task_stats(empty_id), {
+            'pending': 0, 'in_progress': 0, 'completed': 0, 'blocked': 0, 'total': 0
+        })
+
+    def test_task_stats_for_all_projects(self):
+        """Test grouped task statistics and task lookup across projects."""
+        project_a = self.db.create_project("project-a", "Test scope")
+        project_b = self.db.create_project("project-b", "Test scope")
+
+        self.db.add_task(project_a, "Task 1", status='pending')
+        self.db.add_task(project_a, "Task 2", status='completed')
+
+        all_stats = self.db.get_all_task_stats()
+        self.assertEqual(all_stats[project_a]['total'], 2)
+        self.assertEqual(all_stats[project_a]['completed'], 1)
+        self.assertEqual(all_stats[project_b]['total'], 0)
+
+        tasks = self.db.get_tasks_for_projects([project_a, project_b])
+        self.assertEqual([t['description'] for t in tasks[project_a]], ["Task 1", "Task 2"])
+        self.assertEqual(tasks[project_b], [])
+
+    def test_tasks_by_statuses(self):
+        """Test fetching tasks for a subset of statuses."""
+        project_id = self.db.create_project("test-project", "Test scope")
+
+        self.db.add_task(project_id, "Task 1", status='pending')
+        self.db.add_task(project_id, "Task 2", status='in_progress')
+        self.db.add_task(project_id, "Task 3", status='completed')
+
+        tasks = self.db.get_tasks_by_statuses(project_id, ['pending', 'completed'])
+        self.assertEqual([t['description'] for t in tasks], ["Task 1", "Task 3"])
+        self.assertEqual(self.db.get_tasks_by_statuses(project_id, []), [])
 
     def test_sessions(self):
         """Test session management."""
@@ -92,6 +206,113 @@ class TestDatabase(unittest.TestCase):
         active = self.db.get_active_sessions(project_id)
         self.assertEqual(len(active), 0)
 
+    def test_add_learnings_bulk(self):
+        """Test bulk learning import."""
+        project_id = self.db.create_project("test-project", "Test scope")
+
+        learning_ids = self.db.add_learnings([
+            ("Pattern 1", "Context 1", project_id, None),
+            ("Pattern 2", None, project_id, None),
+        ])
+
+        learnings = {l['id']: l for l in self.db.get_learnings(project_id=project_id)}
+        self.assertEqual(set(learnings), set(learning_ids))
+        self.assertEqual(learnings[learning_ids[0]]['pattern'], "Pattern 1")
+        self.assertEqual(self.db.add_learnings([]), [])
+
+    def test_sync_checkpoint_makes_file_self_contained(self):
+        """Test a copy of the database file taken for sync holds all writes."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        self.db.add_task(project_id, "Task 1")
+
+        config_dir = tempfile.mkdtemp()
+        Sync(db_path=self.temp_db.name, config_dir=config_dir)._checkpoint_database()
+
+        copy_path = os.path.join(config_dir, "copy.db")
+        shutil.copy(self.temp_db.name, copy_path)
+        copy = sqlite3.connect(copy_path)
+        try:
+            self.assertEqual(copy.execute("SELECT COUNT(*) FROM tasks").fetchone()[0], 1)
+        finally:
+            copy.close()
+            shutil.rmtree(config_dir)
+
+    def test_session_task_counter(self):
+        """Test buffered session counters are visible to readers."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        session_id = self.db.start_session(project_id, "test-machine")
+
+        for _ in range(3):
+            self.db.increment_session_tasks(session_id)
+
+        self.assertEqual(self.db.get_session(session_id)['tasks_completed'], 3)
+
+        self.db.increment_session_tasks(session_id)
+        self.db.end_session(session_id)
+        row = self.db.conn.execute(
+            "SELECT tasks_completed FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        self.assertEqual(row[0], 4)
+
+    def test_session_task_counter_rolls_back_with_transaction(self):
+        """Test counter increments inside a failed transaction are undone."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        session_id = self.db.start_session(project_id, "test-machine")
+        task_id = self.db.add_task(project_id, "Task 1")
+        self.db.increment_session_tasks(session_id)
+
+        # One increment, and enough to cross the flush threshold mid-block
+        for increments in (1, self.db.COUNTER_FLUSH_THRESHOLD + 1):
+            with self.assertRaises(RuntimeError):
+                with self.db.transaction():
+                    self.db.update_task(task_id, status='completed')
+                    for _ in range(increments):
+                        self.db.increment_session_tasks(session_id)
+                    raise RuntimeError("boom")
+
+            self.assertEqual(self.db.get_task_stats(project_id)['pending'], 1)
+            # The increment buffered before the block survives; those inside do not
+            self.assertEqual(self.db.get_session(session_id)['tasks_completed'], 1)
+
+    def test_mark_task_complete_is_atomic(self):
+        """Test a task and its session counter are committed together."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        session_id = self.db.start_session(project_id, "test-machine")
+        task_id = self.db.add_task(project_id, "Task 1")
+        state = ProjectState(project_id, self.db)
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                state.mark_task_complete(task_id, session_id)
+                raise RuntimeError("boom")
+        self.assertEqual(self.db.get_task_stats(project_id)['pending'], 1)
+        self.assertEqual(self.db.get_session(session_id)['tasks_completed'], 0)
+
+        state.mark_task_complete(task_id, session_id)
+        other = sqlite3.connect(self.temp_db.name)
+        try:
+            row = other.execute(
+                "SELECT t.status, s.tasks_completed FROM tasks t, sessions s "
+                "WHERE t.id = ? AND s.id = ?", (task_id, session_id)
+            ).fetchone()
+        finally:
+            other.close()
+        self.assertEqual(row, ('completed', 1))
+
+    def test_close_twice(self):
+        """Test closing a database a second time is a no-op."""
+        with Database(self.temp_db.name) as db:
+            db.create_project("test-project", "Test scope")
+        db.close()
+
+    def test_unclosed_database_can_be_collected(self):
+        """Test the exit hook does not keep unclosed databases alive."""
+        db = Database(self.temp_db.name)
+        ref = weakref.ref(db)
+        del db
+        gc.collect()
+        self.assertIsNone(ref())
+
 
 class TestTemplates(unittest.TestCase):
     """Test template engine."""
@@ -145,6 +366,10 @@ class TestTemplates(unittest.TestCase):
 
         self.assertIn('custom', expanded)
 
+        custom = [t for t in self.templates.list_templates() if t['type'] == 'custom']
+        self.assertEqual(custom[0]['variables'], ['variable'])
+        self.assertEqual(dict(self.db.get_template('custom-test'))['variables'], ['variable'])
+
 
 class TestScopeChecking(unittest.TestCase):
     """Test scope creep detection."""
@@ -235,6 +460,19 @@ class TestContextManager(unittest.TestCase):
 
         self.assertLessEqual(len(context), self.ctx.max_context_size)
 
+    def test_context_cache_invalidation(self):
+        """Test cached context is refreshed after database changes."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        self.db.add_task(project_id, "First task")
+
+        context = self.ctx.format_context_for_llm(project_id)
+        self.assertEqual(self.ctx.format_context_for_llm(project_id), context)
+
+        self.db.add_learning("Use small commits", project_id=project_id)
+
+        context = self.ctx.format_context_for_llm(project_id)
+        self.assertIn("Use small commits", context)
+
     def test_keyword_extraction(self):
         """Test keyword extraction."""
         project_id = self.db.create_project(
@@ -249,6 +487,22 @@ class TestContextManager(unittest.TestCase):
         self.assertIn('python', keywords)
         self.assertIn('postgresql', keywords)
 
+    def test_batch_relevance_scores(self):
+        """Test batch scoring matches single-task scoring."""
+        project_id = self.db.create_project(
+            "test-project",
+            "Build a web application using Python and PostgreSQL"
+        )
+
+        descriptions = ["Python web application", "Mobile game", "a b"]
+        scores = self.ctx.calculate_relevance_scores(descriptions, project_id)
+
+        self.assertEqual(
+            scores,
+            [self.ctx.calculate_relevance_score(d, project_id) for d in descriptions]
+        )
+        self.assertEqual(scores[2], 0.5)
+
 
 class TestRegistry(unittest.TestCase):
     """Test tool registry."""
@@ -314,6 +568,47 @@ class TestProgressMonitor(unittest.TestCase):
         velocity = self.monitor.get_velocity(project_id, days=7)
 
         self.assertGreater(velocity['tasks_per_day'], 0)
+        self.assertEqual(velocity['tasks_completed'], 5)
+
+        # Preloaded snapshots give the same result as the SQL-filtered path
+        snapshot = self.monitor._load_project_snapshot(project_id)
+        self.assertEqual(
+            self.monitor.get_velocity(project_id, days=7, snapshot=snapshot), velocity
+        )
+        self.assertEqual(self.db.get_tasks_completed_since(project_id, "9999-01-01 00:00:00"), [])
+
+    def test_velocity_excludes_completions_outside_window(self):
+        """Test velocity ignores tasks completed just before the window."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        task_id = self.db.add_task(project_id, "Old task")
+        self.db.update_task(
+            task_id, status='completed',
+            completed_at=(datetime.now() - timedelta(days=7, hours=1)).isoformat()
+        )
+
+        velocity = self.monitor.get_velocity(project_id, days=7)
+        self.assertEqual(velocity['tasks_completed'], 0)
+        snapshot = self.monitor._load_project_snapshot(project_id)
+        self.assertEqual(
+            self.monitor.get_velocity(project_id, days=7, snapshot=snapshot), velocity
+        )
+
+        task_id = self.db.add_task(project_id, "Recent task")
+        self.db.update_task(
+            task_id, status='completed',
+            completed_at=(datetime.now() - timedelta(days=6, hours=23)).isoformat()
+        )
+
+        velocity = self.monitor.get_velocity(project_id, days=7)
+        self.assertEqual(velocity['tasks_completed'], 1)
+        snapshot = self.monitor._load_project_snapshot(project_id)
+        self.assertEqual(
+            self.monitor.get_velocity(project_id, days=7, snapshot=snapshot), velocity
+        )
+
+        # A CURRENT_TIMESTAMP-style cutoff compares by time, not by string
+        since = (datetime.now() - timedelta(days=7)).isoformat(sep=' ', timespec='seconds')
+        self.assertEqual(len(self.db.get_tasks_completed_since(project_id, since)), 1)
 
     def test_health_score(self):
         """Test health score calculation."""
@@ -329,6 +624,59 @@ class TestProgressMonitor(unittest.TestCase):
         self.assertGreaterEqual(health['score'], 0)
         self.assertLessEqual(health['score'], 100)
 
+    def test_project_sessions(self):
+        """Test session analytics list active sessions first."""
+        project_id = self.db.create_project("test-project", "Test scope")
+
+        ended_id = self.db.start_session(project_id, "test-machine")
+        self.db.end_session(ended_id)
+        active_id = self.db.start_session(project_id, "test-machine")
+
+        sessions = self.monitor.get_project_sessions(project_id)
+        self.assertEqual([s['session_id'] for s in sessions], [active_id, ended_id])
+        self.assertTrue(sessions[0]['is_active'])
+        self.assertFalse(sessions[1]['is_active'])
+
+        page = self.monitor.get_project_sessions(project_id, limit=1, offset=1)
+        self.assertEqual([s['session_id'] for s in page], [ended_id])
+
+    def test_productivity_report_query_count(self):
+        """Test a report loads the project snapshot and sessions only once."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        for i in range(3):
+            self.db.add_task(project_id, f"Task {i}")
+        self.db.start_session(project_id, "test-machine")
+
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+        try:
+            report = self.monitor.get_productivity_report(project_id)
+        finally:
+            self.db.conn.set_trace_callback(None)
+
+        self.assertEqual(len(statements), 3)
+        self.assertEqual(report['completion']['total'], 3)
+        self.assertEqual(report['time']['session_count'], 1)
+        self.assertNotIn('sessions', report)
+
+        report = self.monitor.get_productivity_report(project_id, include_sessions=True)
+        self.assertEqual(len(report['sessions']), 1)
+
+    def test_recommendations_for_healthy_project(self):
+        """Test healthy projects only get the progressing-well message."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        for i in range(10):
+            task_id = self.db.add_task(project_id, f"Task {i}")
+            self.db.update_task(task_id, status='completed')
+
+        recommendations = self.monitor.get_recommendations(project_id)
+        self.assertEqual(len(recommendations), 1)
+        self.assertIn("progressing well", recommendations[0])
+
+        self.db.add_task(project_id, "Extra feature", is_scope_creep=True)
+        recommendations = self.monitor.get_recommendations(project_id)
+        self.assertIn("scope creep", recommendations[0])
+
     def test_stuck_detection(self):
         """Test stuck pattern detection."""
         project_id = self.db.create_project("test-project", "Test scope")
@@ -344,6 +692,21 @@ class TestProgressMonitor(unittest.TestCase):
         types = [s['type'] for s in stuck]
         self.assertIn('many_blocked_tasks', types)
 
+    def test_long_running_task_detection(self):
+        """Test in-progress tasks older than a day are flagged."""
+        project_id = self.db.create_project("test-project", "Test scope")
+        old_id = self.db.add_task(project_id, "Old task", status='in_progress')
+        self.db.add_task(project_id, "New task", status='in_progress')
+        self.db.conn.execute(
+            "UPDATE tasks SET created_at = '2020-01-01 00:00:00' WHERE id = ?", (old_id,)
+        )
+        self.db.conn.commit()
+
+        stuck = self.monitor.detect_stuck_patterns(project_id)
+        long_running = [s for s in stuck if s['type'] == 'long_running_task']
+        self.assertEqual([s['task_id'] for s in long_running], [old_id])
+        self.assertGreater(long_running[0]['age_hours'], 24)
+
 
 def run_tests():
     """Run all tests."""